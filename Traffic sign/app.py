@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, send_file
 from werkzeug.utils import secure_filename
 import numpy as np
 from PIL import Image
@@ -6,13 +6,90 @@ import tensorflow as tf
 import os
 from gtts import gTTS
 import base64
+import hashlib
+import hmac
+import io
+import json
+import mimetypes
+import sys
 import tempfile
+import math
+import queue
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
 from datetime import datetime
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 app.config['UPLOAD_FOLDER'] = 'static/uploads/'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'bmp', 'gif'}
+app.config['MAX_IMAGE_DIMENSION'] = 8192
+app.config['MAX_IMAGE_PIXELS'] = 24 * 1024 * 1024
+app.config['MODEL_INPUT_SIZE'] = (30, 30)
+app.config['UPLOAD_PREVIEW_SIZE'] = (256, 256)
+app.config['MAX_CONCURRENT_PREDICTIONS'] = 4
+app.config['MAX_QUEUED_PREDICTIONS'] = 16
+app.config['PREDICTION_QUEUE_TIMEOUT'] = 5.0
+app.config['DEGRADED_QUEUE_DEPTH'] = 8
+app.config['RATE_LIMIT_PER_SECOND'] = 2.0
+app.config['RATE_LIMIT_BURST'] = 10
+app.config['RATE_LIMIT_MAX_CLIENTS'] = 10000
+app.config['MODEL_PATH'] = 'model/traffic_sign_model.h5'
+app.config['MODEL_WARMUP_BATCH_SIZES'] = (1, 2, 8, 32)
+app.config['MODEL_HISTORY_SIZE'] = 3
+app.config['PROFILE_FOLDER'] = 'profiles/'
+app.config['PROFILE_MAX_SECONDS'] = 300
+app.config['PROFILE_INTERVAL'] = 0.005
+app.config['PROFILE_MIN_INTERVAL'] = 0.001
+app.config['PROFILE_MAX_INTERVAL'] = 1.0
+# Distributed mode: front-ends enqueue jobs, inference workers on any node consume them
+app.config['DISTRIBUTED_MODE'] = os.environ.get('DISTRIBUTED_MODE') == '1'
+app.config['NODE_ROLE'] = os.environ.get('NODE_ROLE', 'all')  # 'frontend', 'worker' or 'all'
+app.config['JOB_QUEUE_BACKEND'] = os.environ.get('JOB_QUEUE_BACKEND', 'filesystem')
+app.config['RESULT_STORE_BACKEND'] = os.environ.get('RESULT_STORE_BACKEND', 'filesystem')
+app.config['SHARED_STORE_PATH'] = os.environ.get('SHARED_STORE_PATH', 'shared/')
+app.config['INFERENCE_WORKERS'] = 1
+app.config['JOB_BATCH_SIZE'] = 32
+# Distributed front-ends only wait on remote workers, so they admit enough requests to fill batches
+app.config['DISTRIBUTED_MAX_IN_FLIGHT'] = 128
+app.config['JOB_RESULT_TIMEOUT'] = 10.0
+app.config['JOB_RETRY_AFTER'] = 5
+app.config['JOB_CLAIM_TIMEOUT'] = 60.0
+app.config['JOB_RESULT_TTL'] = 300.0
+app.config['JOB_MAINTENANCE_INTERVAL'] = 30.0
+app.config['STORE_POLL_INTERVAL'] = 0.01
+# Hamming distances between 64-bit perceptual hashes
+# A 9x8 dHash barely sees a sign's digits ("30" vs "50" can hash identically), so hash
+# matches only nominate candidates; reuse and dedupe also require the 30x30 model inputs
+# to agree pixel by pixel within PHASH_MAX_PIXEL_DIFF (0-255)
+app.config['PHASH_REUSE_DISTANCE'] = 4
+app.config['PHASH_DUPLICATE_DISTANCE'] = 2
+# Deliberately strict: re-encodes stay within ~21, but even a 2px re-crop or the next video
+# frame shifts edges by more than different speed-limit digits do, so those are still
+# classified from scratch. They remain findable through /similar, which uses the hash alone.
+app.config['PHASH_MAX_PIXEL_DIFF'] = 48
+# Small radii keep BK-tree queries sublinear; wide ones visit most of the tree
+app.config['PHASH_SIMILAR_DISTANCE'] = 6
+app.config['PHASH_SIMILAR_MAX_DISTANCE'] = 8
+app.config['PHASH_SIMILAR_MAX_LIMIT'] = 50
+# Admin endpoints are disabled unless a token is configured
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')
+
+# Let PIL itself refuse decompression bombs that slip past the header checks
+Image.MAX_IMAGE_PIXELS = app.config['MAX_IMAGE_PIXELS']
+
+# Magic bytes for each accepted format, and the format each extension must carry
+IMAGE_SIGNATURES = {
+    b'\x89PNG\r\n\x1a\n': 'PNG',
+    b'\xff\xd8\xff': 'JPEG',
+    b'GIF87a': 'GIF',
+    b'GIF89a': 'GIF',
+    b'BM': 'BMP',
+}
+EXTENSION_FORMATS = {'png': 'PNG', 'jpg': 'JPEG', 'jpeg': 'JPEG', 'bmp': 'BMP', 'gif': 'GIF'}
 
 # Create upload directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -20,18 +97,368 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
+def sniff_image_format(stream):
+    """Detect the image format from the leading bytes of a stream"""
+    header = stream.read(16)
+    stream.seek(0)
+    for signature, image_format in IMAGE_SIGNATURES.items():
+        if header.startswith(signature):
+            return image_format
+    return None
+
+def validate_image_upload(file):
+    """Check format and dimensions from the image header without decoding pixels"""
+    extension = file.filename.rsplit('.', 1)[1].lower()
+    sniffed_format = sniff_image_format(file.stream)
+    if sniffed_format is None:
+        return None, 'Unrecognized image format'
+    if sniffed_format != EXTENSION_FORMATS[extension]:
+        return None, f'File content ({sniffed_format}) does not match extension .{extension}'
+
+    try:
+        # Image.open only parses the header; pixel data is read on load()
+        image = Image.open(file.stream)
+    except Image.DecompressionBombError:
+        return None, 'Image dimensions are too large'
+    except Exception:
+        return None, 'Corrupt or unreadable image'
+
+    if image.format != sniffed_format:
+        return None, 'Corrupt or unreadable image'
+
+    width, height = image.size
+    max_dimension = app.config['MAX_IMAGE_DIMENSION']
+    if width > max_dimension or height > max_dimension:
+        return None, f'Image dimensions exceed {max_dimension}px limit'
+    if width * height > app.config['MAX_IMAGE_PIXELS']:
+        return None, 'Image has too many pixels'
+
+    return image, None
+
+def decode_image(image):
+    """Decode only as much resolution as the model and the upload preview need"""
+    # JPEG can be DCT-scaled while decoding (down to 1/8), skipping most of the work
+    image.draft('RGB', app.config['UPLOAD_PREVIEW_SIZE'])
+    image = image.convert('RGB')
+    image.thumbnail(app.config['UPLOAD_PREVIEW_SIZE'])
+    return image
+
+class AdmissionController:
+    """Bounded admission queue in front of model inference and TTS"""
+
+    def __init__(self, max_concurrent, max_queued, queue_timeout, degraded_depth):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.degraded_depth = degraded_depth
+        self.active = 0
+        self.waiting = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Take an inference slot, waiting briefly; False means the request should be shed"""
+        with self.condition:
+            if self.waiting == 0 and self.active < self.max_concurrent:
+                self.active += 1
+                return True
+            if self.waiting >= self.max_queued:
+                return False
+            self.waiting += 1
+            try:
+                admitted = self.condition.wait_for(
+                    lambda: self.active < self.max_concurrent, timeout=self.queue_timeout
+                )
+                if admitted:
+                    self.active += 1
+                return admitted
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify()
+
+    def is_degraded(self):
+        """Whether the backlog is deep enough that optional work should be dropped"""
+        with self.condition:
+            return self.waiting >= self.degraded_depth
+
+    def retry_after(self):
+        return max(1, math.ceil(self.queue_timeout))
+
+class TokenBucket:
+    """Per-client token bucket rate limiter"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self):
+        """Take one token; returns 0 on success or the seconds until a token is available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+admission = AdmissionController(
+    app.config['DISTRIBUTED_MAX_IN_FLIGHT'] if app.config['DISTRIBUTED_MODE']
+    else app.config['MAX_CONCURRENT_PREDICTIONS'],
+    app.config['MAX_QUEUED_PREDICTIONS'],
+    app.config['PREDICTION_QUEUE_TIMEOUT'],
+    app.config['DEGRADED_QUEUE_DEPTH'],
+)
+# Least recently seen clients are evicted first once the table is full
+rate_limit_buckets = OrderedDict()
+rate_limit_lock = threading.Lock()
+
+def check_rate_limit(client_id):
+    """Return 0 if the client may proceed, otherwise the seconds it should wait"""
+    with rate_limit_lock:
+        bucket = rate_limit_buckets.get(client_id)
+        if bucket is None:
+            if len(rate_limit_buckets) >= app.config['RATE_LIMIT_MAX_CLIENTS']:
+                rate_limit_buckets.popitem(last=False)
+            bucket = TokenBucket(app.config['RATE_LIMIT_PER_SECOND'], app.config['RATE_LIMIT_BURST'])
+            rate_limit_buckets[client_id] = bucket
+        else:
+            rate_limit_buckets.move_to_end(client_id)
+        return bucket.consume()
+
+def require_admin():
+    """Return an error response unless the request carries the admin token"""
+    admin_token = app.config['ADMIN_TOKEN']
+    if not admin_token:
+        return jsonify({'error': 'Admin endpoints are disabled'}), 403
+    supplied_token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(supplied_token.encode(), admin_token.encode()):
+        return jsonify({'error': 'Invalid admin token'}), 403
+    return None
+
 # Load the trained model
-def load_model():
+def load_model(path):
     try:
-        model = tf.keras.models.load_model('model/traffic_sign_model.h5')
-        print("Model loaded successfully")
+        model = tf.keras.models.load_model(path)
+        print(f"Model loaded successfully from {path}")
         return model
     except Exception as e:
         print(f"Error loading model: {e}")
         return None
 
-# Load model at startup
-model = load_model()
+def file_digest(path):
+    """Short SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as model_file:
+        for chunk in iter(lambda: model_file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+def warmup_model(model):
+    """Run dummy batches so graph tracing happens before live traffic"""
+    height, width = app.config['MODEL_INPUT_SIZE']
+    for batch_size in app.config['MODEL_WARMUP_BATCH_SIZES']:
+        model.predict(np.zeros((batch_size, height, width, 3), dtype=np.float32), verbose=0)
+
+class ModelRegistry:
+    """Versioned model holder supporting background reload and rollback"""
+
+    def __init__(self, history_size):
+        # (model, version) is swapped as a single reference, so readers never need the lock
+        self.active = (None, None)
+        self.history = []
+        self.history_size = history_size
+        self.loading = None
+        self.last_error = None
+        self.load_count = 0
+        self.lock = threading.Lock()
+
+    def current(self):
+        return self.active
+
+    def load(self, path, version=None):
+        """Load, warm up and activate a model; the old one stays live until the swap"""
+        try:
+            if version is None:
+                # The load sequence number keeps versions unique even when the same file is reloaded
+                with self.lock:
+                    self.load_count += 1
+                    sequence = self.load_count
+                version = f'{sequence}-{file_digest(path)}'
+            model = load_model(path)
+            if model is None:
+                raise RuntimeError(f'Could not load model from {path}')
+            warmup_model(model)
+        except Exception as e:
+            with self.lock:
+                self.loading = None
+                self.last_error = str(e)
+            print(f"Error loading model from {path}: {e}")
+            return False
+
+        with self.lock:
+            if self.active[0] is not None:
+                self.history.append(self.active)
+                del self.history[:-self.history_size]
+            self.active = (model, version)
+            self.loading = None
+            self.last_error = None
+        print(f"Model version {version} is now active")
+        return True
+
+    def load_async(self, path, version=None):
+        """Start a background load; False if another load is already running"""
+        with self.lock:
+            if self.loading is not None:
+                return False
+            self.loading = version or path
+        threading.Thread(target=self.load, args=(path, version), daemon=True).start()
+        return True
+
+    def rollback(self):
+        """Reactivate the previous model version; returns it, or None if there is none"""
+        with self.lock:
+            if not self.history:
+                return None
+            self.active = self.history.pop()
+            return self.active[1]
+
+    def status(self):
+        with self.lock:
+            return {
+                'active_version': self.active[1],
+                'previous_versions': [version for _, version in reversed(self.history)],
+                'loading': self.loading,
+                'last_error': self.last_error
+            }
+
+class SamplingProfiler:
+    """Stack sampler for /predict request threads, idle unless explicitly started"""
+
+    TRACKED_FUNCTIONS = ('predict', 'preprocess_image', 'predict_traffic_sign', 'text_to_speech')
+
+    def __init__(self, output_folder):
+        self.output_folder = output_folder
+        self.active = False
+        self.request_threads = set()
+        self.requests_seen = 0
+        self.last_result = None
+        self.lock = threading.Lock()
+
+    def start(self, seconds, max_requests, interval):
+        """Sample for up to `seconds`, or until `max_requests` requests finish if given"""
+        with self.lock:
+            if self.active:
+                return False
+            self.active = True
+            self.requests_seen = 0
+        threading.Thread(target=self.run, args=(seconds, max_requests, interval), daemon=True).start()
+        return True
+
+    def enter_request(self):
+        with self.lock:
+            self.request_threads.add(threading.get_ident())
+
+    def exit_request(self):
+        with self.lock:
+            if threading.get_ident() in self.request_threads:
+                self.request_threads.discard(threading.get_ident())
+                self.requests_seen += 1
+
+    def run(self, seconds, max_requests, interval):
+        stacks = Counter()
+        started = time.monotonic()
+        deadline = started + seconds
+        result = None
+        try:
+            while time.monotonic() < deadline and not (max_requests and self.requests_seen >= max_requests):
+                with self.lock:
+                    thread_ids = list(self.request_threads)
+                frames = sys._current_frames()
+                for thread_id in thread_ids:
+                    frame = frames.get(thread_id)
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                        frame = frame.f_back
+                    if stack:
+                        stacks[';'.join(reversed(stack))] += 1
+                time.sleep(max(0, min(interval, deadline - time.monotonic())))
+            result = self.write_results(stacks, interval, time.monotonic() - started)
+        except Exception as e:
+            print(f"Error in profiler: {e}")
+            result = {'error': str(e)}
+        finally:
+            # Always reset, or a crashed sampler would block new profiles until restart
+            with self.lock:
+                self.last_result = result
+                self.request_threads.clear()
+                self.active = False
+
+    def write_results(self, stacks, interval, elapsed):
+        """Write folded stacks for flamegraph tools plus per-function sample stats"""
+        os.makedirs(self.output_folder, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        folded_path = os.path.join(self.output_folder, f'profile_{timestamp}.folded')
+        stats_path = os.path.join(self.output_folder, f'profile_{timestamp}.json')
+
+        with open(folded_path, 'w') as folded_file:
+            for stack, count in stacks.most_common():
+                folded_file.write(f"{stack} {count}\n")
+
+        self_samples = Counter()
+        total_samples = Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(';')
+            self_samples[frames[-1]] += count
+            for frame in set(frames):
+                total_samples[frame] += count
+
+        functions = [
+            {
+                'function': frame,
+                'self_samples': self_samples[frame],
+                'total_samples': count,
+                'approx_total_seconds': round(count * interval, 4)
+            }
+            for frame, count in total_samples.most_common()
+        ]
+        app_file = os.path.basename(__file__)
+        tracked = {
+            name: next((f for f in functions if f['function'] == f"{app_file}:{name}"), None)
+            for name in self.TRACKED_FUNCTIONS
+        }
+        stats = {
+            'elapsed_seconds': round(elapsed, 3),
+            'interval_seconds': interval,
+            'total_samples': sum(stacks.values()),
+            'requests_profiled': self.requests_seen,
+            'tracked_functions': tracked,
+            'functions': functions
+        }
+        with open(stats_path, 'w') as stats_file:
+            json.dump(stats, stats_file, indent=2)
+
+        return {
+            'folded_path': folded_path,
+            'stats_path': stats_path,
+            'total_samples': stats['total_samples'],
+            'requests_profiled': stats['requests_profiled'],
+            'tracked_functions': tracked
+        }
+
+profiler = SamplingProfiler(app.config['PROFILE_FOLDER'])
+
+# Load and warm up the model at startup; front-end-only nodes never run inference
+model_registry = ModelRegistry(app.config['MODEL_HISTORY_SIZE'])
+if not (app.config['DISTRIBUTED_MODE'] and app.config['NODE_ROLE'] == 'frontend'):
+    model_registry.load(app.config['MODEL_PATH'])
 
 # Supported languages
 SUPPORTED_LANGUAGES = {
@@ -651,26 +1078,36 @@ classes = {
         }
     }
 }
+def model_input_pixels(image):
+    """The image as the model sees it: model-sized RGB pixels"""
+    # Clients that send model-sized images skip the resize
+    if image.size != app.config['MODEL_INPUT_SIZE']:
+        image = image.resize(app.config['MODEL_INPUT_SIZE'])
+    return np.asarray(image.convert('RGB'), dtype=np.uint8)
+
 def preprocess_image(image):
     """Preprocess the image for model prediction"""
-    image = image.resize((30, 30))
-    image_array = np.array(image) / 255.0
+    image_array = model_input_pixels(image) / 255.0
     image_array = np.expand_dims(image_array, axis=0)
     return image_array
 
-def predict_traffic_sign(image):
+def predict_traffic_sign(image, model):
     """Predict traffic sign from image"""
     if model is None:
         return None, None, None, None
     
     processed_image = preprocess_image(image)
     prediction = model.predict(processed_image, verbose=0)
-    predicted_class = np.argmax(prediction, axis=1)[0]
-    confidence = np.max(prediction)
+    return decode_prediction(prediction[0])
+
+def decode_prediction(probabilities):
+    """Turn one row of class probabilities into class name, confidence, top 3 and guidance"""
+    predicted_class = int(np.argmax(probabilities))
+    confidence = np.max(probabilities)
     
     # Get top 3 predictions
-    top3_indices = np.argsort(prediction[0])[-3:][::-1]
-    top3_confidences = prediction[0][top3_indices]
+    top3_indices = np.argsort(probabilities)[-3:][::-1]
+    top3_confidences = probabilities[top3_indices]
     top3_classes = [classes[i] for i in top3_indices]
     
     top_predictions = []
@@ -701,8 +1138,540 @@ def text_to_speech(text, lang_code='en'):
         print(f"Error in text-to-speech: {e}")
         return None
 
+class JobQueue(ABC):
+    """Queue of preprocessed inference jobs shared between nodes"""
+
+    @abstractmethod
+    def put(self, job_id, image_array):
+        """Submit a job"""
+
+    @abstractmethod
+    def get_batch(self, max_items, timeout):
+        """Claim up to max_items (job_id, image_array) pairs, waiting up to timeout for the first.
+
+        image_array is None for a job that could not be read; it must still be acked.
+        """
+
+    @abstractmethod
+    def ack(self, job_id):
+        """Mark a claimed job as finished once its result is stored"""
+
+    @abstractmethod
+    def cancel(self, job_id):
+        """Drop a job no worker has claimed yet; False if it was already claimed or is gone"""
+
+    @abstractmethod
+    def requeue_stale(self, max_age):
+        """Put jobs claimed more than max_age seconds ago, by a worker that died, back in the queue"""
+
+class InProcessJobQueue(JobQueue):
+    """Single-process queue, for tests and single-node deployments"""
+
+    def __init__(self, root=None):
+        self.jobs = queue.Queue()
+        self.pending = set()
+        self.cancelled = set()
+        self.lock = threading.Lock()
+
+    def put(self, job_id, image_array):
+        with self.lock:
+            self.pending.add(job_id)
+        self.jobs.put((job_id, image_array))
+
+    def get_batch(self, max_items, timeout):
+        batch = []
+        try:
+            job = self.jobs.get(timeout=timeout)
+            while True:
+                with self.lock:
+                    if job[0] in self.cancelled:
+                        self.cancelled.discard(job[0])
+                    else:
+                        self.pending.discard(job[0])
+                        batch.append(job)
+                if len(batch) >= max_items:
+                    break
+                job = self.jobs.get_nowait()
+        except queue.Empty:
+            pass
+        return batch
+
+    def ack(self, job_id):
+        pass
+
+    def cancel(self, job_id):
+        with self.lock:
+            if job_id not in self.pending:
+                return False
+            self.pending.discard(job_id)
+            self.cancelled.add(job_id)
+            return True
+
+    def requeue_stale(self, max_age):
+        # Claimed jobs live and die with this process, so there is nothing to recover
+        return 0
+
+class FilesystemJobQueue(JobQueue):
+    """Queue on a (possibly network-mounted) directory; workers claim jobs by atomic rename.
+
+    A claimed job stays in claimed/ until it is acked, and requeue_stale returns jobs
+    whose worker died, so delivery is at-least-once.
+    """
+
+    def __init__(self, root):
+        self.pending = os.path.join(root, 'jobs', 'pending')
+        self.claimed = os.path.join(root, 'jobs', 'claimed')
+        self.staging = os.path.join(root, 'jobs', 'staging')
+        for folder in (self.pending, self.claimed, self.staging):
+            os.makedirs(folder, exist_ok=True)
+
+    def put(self, job_id, image_array):
+        staged = os.path.join(self.staging, f'{job_id}.npy')
+        with open(staged, 'wb') as job_file:
+            np.save(job_file, image_array)
+        os.replace(staged, os.path.join(self.pending, f'{job_id}.npy'))
+
+    def get_batch(self, max_items, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            batch = []
+            # Job ids start with a timestamp, so name order is submission order
+            for name in sorted(os.listdir(self.pending)):
+                if len(batch) >= max_items:
+                    break
+                claimed = os.path.join(self.claimed, name)
+                try:
+                    os.rename(os.path.join(self.pending, name), claimed)
+                    # Staleness is measured from the claim, not from submission
+                    os.utime(claimed)
+                except FileNotFoundError:
+                    continue  # another worker claimed it first
+                job_id = name[:-len('.npy')]
+                try:
+                    batch.append((job_id, np.load(claimed)))
+                except Exception as e:
+                    print(f"Error reading job {job_id}: {e}")
+                    batch.append((job_id, None))
+            if batch or time.monotonic() >= deadline:
+                return batch
+            time.sleep(app.config['STORE_POLL_INTERVAL'])
+
+    def ack(self, job_id):
+        try:
+            os.unlink(os.path.join(self.claimed, f'{job_id}.npy'))
+        except FileNotFoundError:
+            pass
+
+    def cancel(self, job_id):
+        try:
+            os.unlink(os.path.join(self.pending, f'{job_id}.npy'))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def requeue_stale(self, max_age):
+        requeued = 0
+        cutoff = time.time() - max_age
+        for name in os.listdir(self.claimed):
+            claimed = os.path.join(self.claimed, name)
+            try:
+                if os.path.getmtime(claimed) < cutoff:
+                    os.rename(claimed, os.path.join(self.pending, name))
+                    requeued += 1
+            except FileNotFoundError:
+                continue  # acked or requeued by another node meanwhile
+        return requeued
+
+class ResultStore(ABC):
+    """Shared storage for inference results, uploaded images and prediction history"""
+
+    @abstractmethod
+    def put_result(self, job_id, result):
+        """Store a job's result for the waiting front-end"""
+
+    @abstractmethod
+    def get_result(self, job_id, timeout):
+        """Wait up to timeout for a job's result and consume it; None on timeout"""
+
+    @abstractmethod
+    def expire_results(self, max_age):
+        """Delete results nobody collected within max_age seconds"""
+
+    @abstractmethod
+    def save_upload(self, filename, image):
+        """Store an uploaded image"""
+
+    @abstractmethod
+    def read_upload(self, filename):
+        """Return the stored image bytes, or None if there is no such upload"""
+
+    @abstractmethod
+    def delete_upload(self, filename):
+        """Delete an upload and its history record; False if it did not exist"""
+
+    @abstractmethod
+    def put_history(self, filename, record):
+        """Store the prediction history record for an upload"""
+
+    @abstractmethod
+    def list_history(self):
+        """Return all history records"""
+
+    @abstractmethod
+    def clear(self):
+        """Delete all uploads and history"""
+
+class LocalFilesystemStore(ResultStore):
+    """Result store on a local or network-mounted directory"""
+
+    def __init__(self, root):
+        self.results = os.path.join(root, 'results')
+        self.uploads = os.path.join(root, 'uploads')
+        self.history = os.path.join(root, 'history')
+        for folder in (self.results, self.uploads, self.history):
+            os.makedirs(folder, exist_ok=True)
+
+    def write_json(self, path, data):
+        # Write then rename so readers on other nodes never see a partial file
+        staged = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(staged, 'w') as json_file:
+            json.dump(data, json_file)
+        os.replace(staged, path)
+
+    def put_result(self, job_id, result):
+        self.write_json(os.path.join(self.results, f'{job_id}.json'), result)
+
+    def get_result(self, job_id, timeout):
+        path = os.path.join(self.results, f'{job_id}.json')
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(path):
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(app.config['STORE_POLL_INTERVAL'])
+        with open(path) as json_file:
+            result = json.load(json_file)
+        os.unlink(path)
+        return result
+
+    def expire_results(self, max_age):
+        # Also sweeps temporary files left by writers that crashed mid-write
+        cutoff = time.time() - max_age
+        for name in os.listdir(self.results):
+            path = os.path.join(self.results, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.unlink(path)
+            except FileNotFoundError:
+                continue
+
+    def save_upload(self, filename, image):
+        image.save(os.path.join(self.uploads, filename))
+
+    def read_upload(self, filename):
+        path = os.path.join(self.uploads, filename)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as upload_file:
+            return upload_file.read()
+
+    def delete_upload(self, filename):
+        path = os.path.join(self.uploads, filename)
+        if not os.path.exists(path):
+            return False
+        os.unlink(path)
+        history_path = os.path.join(self.history, f'{filename}.json')
+        if os.path.exists(history_path):
+            os.unlink(history_path)
+        return True
+
+    def put_history(self, filename, record):
+        self.write_json(os.path.join(self.history, f'{filename}.json'), record)
+
+    def list_history(self):
+        records = []
+        for name in os.listdir(self.history):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.history, name)) as json_file:
+                    records.append(json.load(json_file))
+            except (OSError, ValueError):
+                continue  # deleted or being replaced by another node
+        return records
+
+    def clear(self):
+        for folder in (self.uploads, self.history):
+            for name in os.listdir(folder):
+                path = os.path.join(folder, name)
+                if os.path.isfile(path):
+                    os.unlink(path)
+
+# Register additional backends here to plug in other queue or storage services
+JOB_QUEUE_BACKENDS = {
+    'inprocess': InProcessJobQueue,
+    'filesystem': FilesystemJobQueue,
+}
+RESULT_STORE_BACKENDS = {
+    'filesystem': LocalFilesystemStore,
+}
+
+class InferenceWorker(threading.Thread):
+    """Consumes queued jobs in batches and runs them through the active model"""
+
+    def __init__(self, job_queue, result_store, batch_size):
+        super().__init__(daemon=True)
+        self.job_queue = job_queue
+        self.result_store = result_store
+        self.batch_size = batch_size
+
+    def run(self):
+        next_maintenance = 0
+        while True:
+            try:
+                if time.monotonic() >= next_maintenance:
+                    self.maintain()
+                    next_maintenance = time.monotonic() + app.config['JOB_MAINTENANCE_INTERVAL']
+                batch = self.job_queue.get_batch(self.batch_size, timeout=1.0)
+                if batch:
+                    self.process(batch)
+            except Exception as e:
+                # Unacked jobs stay claimed and are requeued once they go stale
+                print(f"Error in inference worker: {e}")
+                time.sleep(1.0)
+
+    def maintain(self):
+        """Recover jobs from dead workers and drop results whose requester gave up"""
+        requeued = self.job_queue.requeue_stale(app.config['JOB_CLAIM_TIMEOUT'])
+        if requeued:
+            print(f"Requeued {requeued} stale jobs")
+        self.result_store.expire_results(app.config['JOB_RESULT_TTL'])
+
+    def process(self, batch):
+        results = {job_id: {'error': 'Could not read job'} for job_id, array in batch if array is None}
+        readable = [(job_id, array) for job_id, array in batch if array is not None]
+        if readable:
+            model, model_version = model_registry.current()
+            try:
+                if model is None:
+                    raise RuntimeError('Model not available')
+                predictions = model.predict(np.stack([array for _, array in readable]), verbose=0)
+                for (job_id, _), probabilities in zip(readable, predictions):
+                    results[job_id] = {'probabilities': probabilities.tolist(), 'model_version': model_version}
+            except Exception as e:
+                print(f"Error in batch inference: {e}")
+                for job_id, _ in readable:
+                    results[job_id] = {'error': str(e)}
+        for job_id, result in results.items():
+            self.result_store.put_result(job_id, result)
+            self.job_queue.ack(job_id)
+
+def predict_distributed(image):
+    """Enqueue a preprocessed image and wait for any worker to return its prediction.
+
+    Returns (prediction, model_version, error); error is 'timeout' or the worker's message.
+    """
+    job_id = f"{time.time_ns():020d}_{uuid.uuid4().hex}"
+    job_queue.put(job_id, preprocess_image(image)[0])
+    result = result_store.get_result(job_id, app.config['JOB_RESULT_TIMEOUT'])
+    if result is None:
+        # Withdraw the job if no worker has it yet; a late result is expired by the workers
+        job_queue.cancel(job_id)
+        return None, None, 'timeout'
+    if 'error' in result:
+        return None, None, result['error']
+    return decode_prediction(np.array(result['probabilities'])), result['model_version'], None
+
+def upload_url(filename):
+    if app.config['DISTRIBUTED_MODE']:
+        return f'/shared/uploads/{filename}'
+    return f'/static/uploads/{filename}'
+
+def validate_distributed_config():
+    """Fail at startup on distributed settings that could never serve a request"""
+    role = app.config['NODE_ROLE']
+    queue_backend = app.config['JOB_QUEUE_BACKEND']
+    if role not in ('frontend', 'worker', 'all'):
+        raise ValueError(f"NODE_ROLE must be 'frontend', 'worker' or 'all', not {role!r}")
+    if queue_backend not in JOB_QUEUE_BACKENDS:
+        raise ValueError(f"Unknown JOB_QUEUE_BACKEND {queue_backend!r}")
+    if app.config['RESULT_STORE_BACKEND'] not in RESULT_STORE_BACKENDS:
+        raise ValueError(f"Unknown RESULT_STORE_BACKEND {app.config['RESULT_STORE_BACKEND']!r}")
+    if queue_backend == 'inprocess' and role != 'all':
+        # Nothing outside this process can see the queue, so front-end and workers must share it
+        raise ValueError("JOB_QUEUE_BACKEND 'inprocess' requires NODE_ROLE 'all'")
+    if role != 'frontend' and app.config['INFERENCE_WORKERS'] < 1:
+        raise ValueError('INFERENCE_WORKERS must be at least 1 on worker nodes')
+
+job_queue = None
+result_store = None
+if app.config['DISTRIBUTED_MODE']:
+    validate_distributed_config()
+    job_queue = JOB_QUEUE_BACKENDS[app.config['JOB_QUEUE_BACKEND']](app.config['SHARED_STORE_PATH'])
+    result_store = RESULT_STORE_BACKENDS[app.config['RESULT_STORE_BACKEND']](app.config['SHARED_STORE_PATH'])
+    if app.config['NODE_ROLE'] in ('worker', 'all'):
+        for _ in range(app.config['INFERENCE_WORKERS']):
+            InferenceWorker(job_queue, result_store, app.config['JOB_BATCH_SIZE']).start()
+
+def perceptual_hash(image):
+    """64-bit difference hash: left-to-right brightness gradients of a 9x8 thumbnail"""
+    pixels = np.asarray(image.convert('L').resize((9, 8)), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+def pixels_match(a, b):
+    """Whether two model inputs are close enough that the model would see the same sign"""
+    if a is None or b is None:
+        return False
+    difference = np.abs(a.astype(np.int16) - b.astype(np.int16))
+    return int(difference.max()) <= app.config['PHASH_MAX_PIXEL_DIFF']
+
+class BKTree:
+    """Metric tree over Hamming distance; range queries only visit branches that can match"""
+
+    def __init__(self):
+        # Each node is (hash, [values], {distance: child})
+        self.root = None
+
+    def add(self, key, value):
+        if self.root is None:
+            self.root = (key, [value], {})
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(key, node[0])
+            if distance == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (key, [value], {})
+                return
+            node = child
+
+    def search(self, key, max_distance):
+        """Return (distance, value) pairs within max_distance of key"""
+        results = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node_key, values, children = stack.pop()
+            distance = hamming_distance(key, node_key)
+            if distance <= max_distance:
+                results.extend((distance, value) for value in values)
+            # Triangle inequality: only children in this band can hold matches
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return results
+
+class PerceptualHashIndex:
+    """Perceptual hashes of uploads with their predictions, for reuse and near-duplicate search"""
+
+    def __init__(self):
+        self.tree = BKTree()
+        self.entries = {}
+        self.stale = 0
+        self.lock = threading.Lock()
+
+    def add(self, filename, image_hash, pixels=None, prediction=None, model_version=None,
+            duplicate_of=None, replace=True):
+        with self.lock:
+            if filename in self.entries:
+                if not replace:
+                    return
+                self.stale += 1
+            entry = {
+                'filename': filename,
+                'hash': image_hash,
+                'pixels': pixels,
+                'prediction': prediction,
+                'model_version': model_version,
+                'duplicate_of': duplicate_of
+            }
+            self.entries[filename] = entry
+            self.tree.add(image_hash, entry)
+
+    def remove(self, filename):
+        with self.lock:
+            if self.entries.pop(filename, None) is None:
+                return
+            # BK-trees don't support deletion; drop dead entries lazily and rebuild when they pile up
+            self.stale += 1
+            if self.stale > len(self.entries):
+                self.tree = BKTree()
+                for entry in self.entries.values():
+                    self.tree.add(entry['hash'], entry)
+                self.stale = 0
+
+    def clear(self):
+        with self.lock:
+            self.tree = BKTree()
+            self.entries = {}
+            self.stale = 0
+
+    def search(self, image_hash, max_distance, limit=None):
+        """Return (distance, entry) pairs for live uploads within max_distance, nearest first"""
+        with self.lock:
+            matches = [
+                (distance, entry) for distance, entry in self.tree.search(image_hash, max_distance)
+                if self.entries.get(entry['filename']) is entry
+            ]
+        matches.sort(key=lambda match: match[0])
+        return matches if limit is None else matches[:limit]
+
+    def find_reusable(self, image_hash, pixels, max_distance, model_version):
+        """Nearest verified near-identical upload predicted by model_version, or None"""
+        for distance, entry in self.search(image_hash, max_distance):
+            if entry['prediction'] is None or entry['model_version'] != model_version:
+                continue
+            if pixels_match(pixels, entry['pixels']):
+                return distance, entry
+        return None
+
+    def find_duplicate(self, image_hash, pixels, max_distance):
+        """Filename of a verified near-identical earlier upload, or None"""
+        for _, entry in self.search(image_hash, max_distance):
+            if pixels_match(pixels, entry['pixels']):
+                return entry['filename']
+        return None
+
+    def duplicates(self):
+        with self.lock:
+            return [
+                {'filename': entry['filename'], 'duplicate_of': entry['duplicate_of']}
+                for entry in self.entries.values() if entry['duplicate_of']
+            ]
+
+phash_index = PerceptualHashIndex()
+
+def index_existing_uploads():
+    """Hash uploads from earlier runs so they take part in similarity search"""
+    if app.config['DISTRIBUTED_MODE']:
+        for record in result_store.list_history():
+            if record.get('phash'):
+                phash_index.add(record['filename'], int(record['phash'], 16), replace=False)
+        return
+
+    upload_folder = app.config['UPLOAD_FOLDER']
+    for filename in os.listdir(upload_folder):
+        if not allowed_file(filename):
+            continue
+        try:
+            with Image.open(os.path.join(upload_folder, filename)) as image:
+                image = decode_image(image)
+                phash_index.add(filename, perceptual_hash(image), model_input_pixels(image), replace=False)
+        except Exception as e:
+            print(f"Error hashing {filename}: {e}")
+
+threading.Thread(target=index_existing_uploads, daemon=True).start()
+
 def get_saved_images():
     """Get list of saved prediction images"""
+    if app.config['DISTRIBUTED_MODE']:
+        return sorted(result_store.list_history(), key=lambda x: x['upload_time'], reverse=True)
+
     images = []
     upload_folder = app.config['UPLOAD_FOLDER']
     if os.path.exists(upload_folder):
@@ -717,13 +1686,34 @@ def get_saved_images():
                 })
     return sorted(images, key=lambda x: x['upload_time'], reverse=True)
 
+@app.before_request
+def start_request_profiling():
+    # A single flag check is all profiling costs while it is off
+    if profiler.active and request.endpoint == 'predict':
+        profiler.enter_request()
+
+@app.teardown_request
+def finish_request_profiling(exc):
+    if profiler.active and request.endpoint == 'predict':
+        profiler.exit_request()
+
 @app.route('/')
 def index():
     saved_images = get_saved_images()
-    return render_template('index.html', saved_images=saved_images)
+    return render_template(
+        'index.html',
+        saved_images=saved_images,
+        upload_preview_size=app.config['UPLOAD_PREVIEW_SIZE']
+    )
 
 @app.route('/predict', methods=['POST'])
 def predict():
+    retry_after = check_rate_limit(request.remote_addr)
+    if retry_after:
+        return jsonify({'error': 'Too many requests, please slow down'}), 429, {
+            'Retry-After': str(math.ceil(retry_after))
+        }
+
     if 'file' not in request.files:
         return jsonify({'error': 'No file uploaded'}), 400
     
@@ -737,48 +1727,122 @@ def predict():
         return jsonify({'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
+        # Validate the header before decoding any pixels, and before a bad upload can hold a slot
+        image, validation_error = validate_image_upload(file)
+        if validation_error:
+            return jsonify({'error': validation_error}), 400
+        if not admission.acquire():
+            return jsonify({'error': 'Server is busy, please retry shortly'}), 503, {
+                'Retry-After': str(admission.retry_after())
+            }
+        filename = None
         try:
-            # Read and process image
-            image = Image.open(file.stream).convert('RGB')
+            try:
+                image = decode_image(image)
+            except (OSError, SyntaxError):
+                # A valid header can still front truncated or corrupt pixel data
+                return jsonify({'error': 'Corrupt or unreadable image'}), 400
             
             # Save uploaded image with timestamp
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             original_filename = secure_filename(file.filename)
             name, ext = os.path.splitext(original_filename)
             filename = f"{name}_{timestamp}{ext}"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            image.save(filepath)
+            if app.config['DISTRIBUTED_MODE']:
+                # Other nodes may store an upload with the same name in the same second
+                filename = f"{name}_{timestamp}_{uuid.uuid4().hex[:8]}{ext}"
+                result_store.save_upload(filename, image)
+            else:
+                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+                image.save(filepath)
+            
+            # Re-encodes of an earlier upload reuse its prediction; anything that moves pixels is re-run
+            image_hash = perceptual_hash(image)
+            image_pixels = model_input_pixels(image)
+            match = None
+            # Front-ends can't tell which model version the workers serve, so distributed mode never reuses
+            if not app.config['DISTRIBUTED_MODE']:
+                match = phash_index.find_reusable(
+                    image_hash, image_pixels, app.config['PHASH_REUSE_DISTANCE'], model_registry.current()[1]
+                )
+            duplicate_of = phash_index.find_duplicate(
+                image_hash, image_pixels, app.config['PHASH_DUPLICATE_DISTANCE']
+            )
             
-            # Make prediction
-            predicted_class, confidence, top_predictions, guidance_dict = predict_traffic_sign(image)
+            if match:
+                predicted_class, confidence, top_predictions, guidance_dict = match[1]['prediction']
+                model_version = match[1]['model_version']
+            elif app.config['DISTRIBUTED_MODE']:
+                prediction, model_version, inference_error = predict_distributed(image)
+                if inference_error:
+                    # Roll back the upload so the shared gallery has no image without history
+                    result_store.delete_upload(filename)
+                    retry_headers = {'Retry-After': str(app.config['JOB_RETRY_AFTER'])}
+                    if inference_error == 'timeout':
+                        return jsonify({'error': 'Inference timed out, please retry shortly'}), 504, retry_headers
+                    return jsonify({'error': f'Inference failed: {inference_error}'}), 503, retry_headers
+                predicted_class, confidence, top_predictions, guidance_dict = prediction
+            else:
+                # Make prediction against a single model snapshot, even if a swap happens meanwhile
+                model, model_version = model_registry.current()
+                predicted_class, confidence, top_predictions, guidance_dict = predict_traffic_sign(image, model)
             
             if predicted_class is None:
                 return jsonify({'error': 'Model not available'}), 500
             
+            phash_index.add(
+                filename, image_hash, image_pixels,
+                (predicted_class, confidence, top_predictions, guidance_dict),
+                model_version, duplicate_of
+            )
+            
+            upload_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            if app.config['DISTRIBUTED_MODE']:
+                result_store.put_history(filename, {
+                    'filename': filename,
+                    'path': upload_url(filename),
+                    'upload_time': upload_time,
+                    'predicted_class': predicted_class,
+                    'confidence': confidence,
+                    'model_version': model_version,
+                    'phash': f'{image_hash:016x}',
+                    'duplicate_of': duplicate_of
+                })
+            
             # Get guidance in the selected language, fallback to English
             guidance = guidance_dict.get(language, guidance_dict['en'])
             
-            # Generate alert message with guidance
+            # Generate alert message with guidance; audio is the first thing shed under load
             alert_message = f"{predicted_class}. {guidance}"
-            audio_base64 = text_to_speech(alert_message, language)
+            degraded = admission.is_degraded()
+            audio_base64 = None if degraded else text_to_speech(alert_message, language)
             
             response = {
                 'predicted_class': predicted_class,
                 'confidence': confidence,
                 'guidance': guidance,
                 'top_predictions': top_predictions,
-                'image_url': f'/static/uploads/{filename}',
+                'image_url': upload_url(filename),
                 'image_filename': filename,
                 'audio_data': audio_base64,
                 'alert_message': alert_message,
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'language': language
+                'timestamp': upload_time,
+                'language': language,
+                'degraded': degraded,
+                'model_version': model_version,
+                'reused_prediction': match is not None,
+                'similar_to': match[1]['filename'] if match else None,
+                'duplicate_of': duplicate_of
             }
             
             return jsonify(response)
             
         except Exception as e:
+            if app.config['DISTRIBUTED_MODE'] and filename:
+                result_store.delete_upload(filename)
             return jsonify({'error': f'Error processing image: {str(e)}'}), 500
+        finally:
+            admission.release()
     
     return jsonify({'error': 'Invalid file type'}), 400
 
@@ -786,6 +1850,10 @@ def predict():
 def clear_predictions():
     """Clear all saved predictions"""
     try:
+        phash_index.clear()
+        if app.config['DISTRIBUTED_MODE']:
+            result_store.clear()
+            return jsonify({'success': 'All predictions cleared'})
         upload_folder = app.config['UPLOAD_FOLDER']
         if os.path.exists(upload_folder):
             for filename in os.listdir(upload_folder):
@@ -800,6 +1868,11 @@ def clear_predictions():
 def delete_image(filename):
     """Delete a specific image"""
     try:
+        phash_index.remove(secure_filename(filename))
+        if app.config['DISTRIBUTED_MODE']:
+            if result_store.delete_upload(secure_filename(filename)):
+                return jsonify({'success': 'Image deleted'})
+            return jsonify({'error': 'Image not found'}), 404
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(filename))
         if os.path.exists(filepath):
             os.unlink(filepath)
@@ -808,5 +1881,132 @@ def delete_image(filename):
     except Exception as e:
         return jsonify({'error': f'Error deleting image: {str(e)}'}), 500
 
+@app.route('/shared/uploads/<filename>')
+def shared_upload(filename):
+    """Serve an upload from the shared store so any node can show any node's images"""
+    if not app.config['DISTRIBUTED_MODE']:
+        return jsonify({'error': 'Distributed mode is disabled'}), 404
+    filename = secure_filename(filename)
+    data = result_store.read_upload(filename)
+    if data is None:
+        return jsonify({'error': 'Image not found'}), 404
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    return send_file(io.BytesIO(data), mimetype=mimetype)
+
+@app.route('/similar/<filename>', methods=['GET'])
+def similar_images(filename):
+    """Find uploads that look like the given one, nearest first"""
+    entry = phash_index.entries.get(secure_filename(filename))
+    if entry is None:
+        return jsonify({'error': 'Image not found'}), 404
+    try:
+        max_distance = int(request.args.get('max_distance', app.config['PHASH_SIMILAR_DISTANCE']))
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({'error': 'max_distance and limit must be integers'}), 400
+    if not 0 <= max_distance <= app.config['PHASH_SIMILAR_MAX_DISTANCE']:
+        return jsonify({'error': f"max_distance must be between 0 and {app.config['PHASH_SIMILAR_MAX_DISTANCE']}"}), 400
+    if not 1 <= limit <= app.config['PHASH_SIMILAR_MAX_LIMIT']:
+        return jsonify({'error': f"limit must be between 1 and {app.config['PHASH_SIMILAR_MAX_LIMIT']}"}), 400
+
+    similar = []
+    for distance, match in phash_index.search(entry['hash'], max_distance, limit + 1):
+        if match is entry:
+            continue
+        similar.append({
+            'filename': match['filename'],
+            'path': upload_url(match['filename']),
+            'distance': distance,
+            'predicted_class': match['prediction'][0] if match['prediction'] else None
+        })
+    return jsonify({'filename': entry['filename'], 'similar': similar[:limit]})
+
+@app.route('/admin/duplicates', methods=['GET'])
+def duplicate_images():
+    """List uploads flagged as near-duplicates of an earlier upload, for storage dedupe"""
+    denied = require_admin()
+    if denied:
+        return denied
+    return jsonify({'duplicates': phash_index.duplicates()})
+
+@app.route('/admin/model', methods=['GET'])
+def model_status():
+    """Report the active model version and reload state"""
+    denied = require_admin()
+    if denied:
+        return denied
+    return jsonify(model_registry.status())
+
+@app.route('/admin/model/reload', methods=['POST'])
+def reload_model():
+    """Load a new model version in the background and swap it in once warm"""
+    denied = require_admin()
+    if denied:
+        return denied
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    path = data.get('path', app.config['MODEL_PATH'])
+    version = data.get('version')
+    if not isinstance(path, str) or not (version is None or isinstance(version, str)):
+        return jsonify({'error': 'path and version must be strings'}), 400
+    # Only models inside the model directory may be loaded
+    model_dir = os.path.realpath(os.path.dirname(app.config['MODEL_PATH']))
+    if os.path.commonpath([model_dir, os.path.realpath(path)]) != model_dir:
+        return jsonify({'error': 'path must be inside the model directory'}), 400
+    if not os.path.isfile(path):
+        return jsonify({'error': f'Model file not found: {path}'}), 404
+    if not model_registry.load_async(path, version):
+        return jsonify({'error': 'A model reload is already in progress'}), 409
+    return jsonify({'success': 'Model reload started', 'status': model_registry.status()}), 202
+
+@app.route('/admin/model/rollback', methods=['POST'])
+def rollback_model():
+    """Switch back to the previously active model version"""
+    denied = require_admin()
+    if denied:
+        return denied
+    version = model_registry.rollback()
+    if version is None:
+        return jsonify({'error': 'No previous model version to roll back to'}), 409
+    return jsonify({'success': f'Rolled back to model version {version}'})
+
+@app.route('/admin/profile', methods=['GET'])
+def profile_status():
+    """Report whether profiling is running and the most recent result"""
+    denied = require_admin()
+    if denied:
+        return denied
+    return jsonify({'active': profiler.active, 'last_result': profiler.last_result})
+
+@app.route('/admin/profile', methods=['POST'])
+def start_profile():
+    """Sample /predict requests for N seconds or N requests"""
+    denied = require_admin()
+    if denied:
+        return denied
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    try:
+        max_seconds = app.config['PROFILE_MAX_SECONDS']
+        seconds = float(data.get('seconds', max_seconds if data.get('requests') else 30))
+        max_requests = int(data.get('requests', 0))
+        interval = float(data.get('interval', app.config['PROFILE_INTERVAL']))
+    except (TypeError, ValueError, OverflowError):
+        return jsonify({'error': 'seconds, requests and interval must be numbers'}), 400
+    if not (math.isfinite(seconds) and math.isfinite(interval)):
+        return jsonify({'error': 'seconds and interval must be finite'}), 400
+    if seconds <= 0 or max_requests < 0 or interval <= 0:
+        return jsonify({'error': 'seconds and interval must be positive'}), 400
+    seconds = min(seconds, max_seconds)
+    # Faster sampling just busy-loops on the GIL; slower would overrun the window
+    interval = max(min(interval, seconds, app.config['PROFILE_MAX_INTERVAL']), app.config['PROFILE_MIN_INTERVAL'])
+    if not profiler.start(seconds, max_requests, interval):
+        return jsonify({'error': 'Profiling is already running'}), 409
+    return jsonify({
+        'success': 'Profiling started', 'seconds': seconds, 'requests': max_requests, 'interval': interval
+    }), 202
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
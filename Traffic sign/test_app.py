@@ -0,0 +1,250 @@
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+pytest.importorskip('flask')
+pytest.importorskip('tensorflow')
+pytest.importorskip('gtts')
+
+import app
+
+
+def speed_limit_sign(text):
+    """Red ring, white disc and black digits: the layout every speed-limit sign shares"""
+    try:
+        font = ImageFont.load_default(size=70)
+    except TypeError:
+        pytest.skip('Pillow is too old for a sized default font')
+    sign = Image.new('RGB', (200, 200), (200, 200, 200))
+    draw = ImageDraw.Draw(sign)
+    draw.ellipse((10, 10, 190, 190), fill='red')
+    draw.ellipse((35, 35, 165, 165), fill='white')
+    draw.text((100, 100), text, fill='black', font=font, anchor='mm')
+    return sign
+
+
+def reencode(image, quality=60):
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality)
+    buffer.seek(0)
+    return Image.open(buffer).convert('RGB')
+
+
+def indexed_sign(index, filename, image, class_id, model_version='v1'):
+    cls = app.classes[class_id]
+    prediction = (cls['name'], 0.99, [], cls['guidance'])
+    index.add(filename, app.perceptual_hash(image), app.model_input_pixels(image), prediction, model_version)
+
+
+def test_different_speed_limits_never_share_a_prediction():
+    index = app.PerceptualHashIndex()
+    thirty = speed_limit_sign('30')
+    indexed_sign(index, '30.png', thirty, 1)
+
+    for text in ('20', '50', '60', '80'):
+        other = speed_limit_sign(text)
+        other_hash = app.perceptual_hash(other)
+        other_pixels = app.model_input_pixels(other)
+        assert index.find_reusable(other_hash, other_pixels, app.app.config['PHASH_REUSE_DISTANCE'], 'v1') is None
+        assert index.find_duplicate(other_hash, other_pixels, app.app.config['PHASH_DUPLICATE_DISTANCE']) is None
+
+
+def test_reencoded_sign_reuses_prediction_from_same_model_only():
+    index = app.PerceptualHashIndex()
+    thirty = speed_limit_sign('30')
+    indexed_sign(index, '30.png', thirty, 1)
+
+    copy = reencode(thirty)
+    copy_hash = app.perceptual_hash(copy)
+    copy_pixels = app.model_input_pixels(copy)
+    match = index.find_reusable(copy_hash, copy_pixels, app.app.config['PHASH_REUSE_DISTANCE'], 'v1')
+    assert match is not None and match[1]['filename'] == '30.png'
+    assert index.find_reusable(copy_hash, copy_pixels, app.app.config['PHASH_REUSE_DISTANCE'], 'v2') is None
+    assert index.find_duplicate(copy_hash, copy_pixels, app.app.config['PHASH_DUPLICATE_DISTANCE']) == '30.png'
+
+
+
+def test_recropped_sign_is_similar_but_not_reused():
+    # Shifting the frame by 2px moves edges more than a digit change, so reuse is refused
+    index = app.PerceptualHashIndex()
+    thirty = speed_limit_sign('30')
+    indexed_sign(index, '30.png', thirty, 1)
+
+    cropped = thirty.crop((2, 2, 198, 198))
+    cropped_hash = app.perceptual_hash(cropped)
+    cropped_pixels = app.model_input_pixels(cropped)
+    assert index.find_reusable(cropped_hash, cropped_pixels, app.app.config['PHASH_REUSE_DISTANCE'], 'v1') is None
+    assert index.find_duplicate(cropped_hash, cropped_pixels, app.app.config['PHASH_DUPLICATE_DISTANCE']) is None
+    similar = index.search(cropped_hash, app.app.config['PHASH_SIMILAR_DISTANCE'])
+    assert [entry['filename'] for _, entry in similar] == ['30.png']
+
+def test_similar_search_respects_limit():
+    index = app.PerceptualHashIndex()
+    for i in range(5):
+        index.add(f'{i}.png', 0b1 << i)
+    assert len(index.search(0, 2, limit=2)) == 2
+    assert index.search(0, 2, limit=0) == []
+
+
+def start_waiters(controller, count):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(controller.acquire())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def wait_for_waiters(controller, count):
+    deadline = time.monotonic() + 1.0
+    while controller.waiting < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_admission_sheds_when_queue_is_full():
+    controller = app.AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=1.0, degraded_depth=1)
+    assert controller.acquire()
+    threads, results = start_waiters(controller, 1)
+    wait_for_waiters(controller, 1)
+
+    assert controller.acquire() is False  # queue already holds one waiter
+    controller.release()
+    for thread in threads:
+        thread.join()
+    assert results == [True]
+
+
+def test_admission_queue_wait_times_out():
+    controller = app.AdmissionController(max_concurrent=1, max_queued=4, queue_timeout=0.05, degraded_depth=4)
+    assert controller.acquire()
+    started = time.monotonic()
+    assert controller.acquire() is False
+    assert time.monotonic() - started >= 0.05
+    assert controller.waiting == 0
+
+
+def test_admission_degrades_once_backlog_reaches_threshold():
+    controller = app.AdmissionController(max_concurrent=1, max_queued=4, queue_timeout=1.0, degraded_depth=2)
+    assert controller.acquire()
+    assert not controller.is_degraded()
+
+    threads, results = start_waiters(controller, 2)
+    wait_for_waiters(controller, 2)
+    assert controller.is_degraded()
+
+    controller.release()
+    controller.release()
+    for thread in threads:
+        thread.join()
+    assert results == [True, True]
+    assert not controller.is_degraded()
+
+
+def test_token_bucket_allows_burst_then_asks_client_to_wait():
+    bucket = app.TokenBucket(rate=10.0, capacity=2)
+    assert bucket.consume() == 0
+    assert bucket.consume() == 0
+    retry_after = bucket.consume()
+    assert 0 < retry_after <= 0.1
+
+    time.sleep(retry_after + 0.01)
+    assert bucket.consume() == 0
+
+
+def job_array(value):
+    return np.full((30, 30, 3), value, dtype=np.float32)
+
+
+def test_filesystem_queue_claims_each_job_once(tmp_path):
+    first = app.FilesystemJobQueue(str(tmp_path))
+    second = app.FilesystemJobQueue(str(tmp_path))
+    for i in range(4):
+        first.put(f'{i:02d}_job', job_array(i))
+
+    claimed = first.get_batch(3, timeout=0) + second.get_batch(3, timeout=0)
+    assert sorted(job_id for job_id, _ in claimed) == ['00_job', '01_job', '02_job', '03_job']
+    assert [float(array[0, 0, 0]) for _, array in claimed] == [0.0, 1.0, 2.0, 3.0]
+    assert os.listdir(first.pending) == []
+    assert len(os.listdir(first.claimed)) == 4
+
+    for job_id, _ in claimed:
+        first.ack(job_id)
+    assert os.listdir(first.claimed) == []
+
+
+def test_filesystem_queue_cancel_only_removes_unclaimed_jobs(tmp_path):
+    jobs = app.FilesystemJobQueue(str(tmp_path))
+    jobs.put('00_waiting', job_array(0))
+    jobs.put('01_claimed', job_array(1))
+    assert jobs.cancel('00_waiting')
+    assert jobs.get_batch(1, timeout=0)[0][0] == '01_claimed'
+    assert not jobs.cancel('01_claimed')
+    assert jobs.get_batch(1, timeout=0) == []
+
+
+def test_filesystem_queue_requeues_jobs_from_dead_workers(tmp_path):
+    jobs = app.FilesystemJobQueue(str(tmp_path))
+    jobs.put('00_job', job_array(0))
+    jobs.get_batch(1, timeout=0)  # claimed by a worker that never acks
+
+    assert jobs.requeue_stale(max_age=60) == 0
+    claimed = os.path.join(jobs.claimed, '00_job.npy')
+    os.utime(claimed, (time.time() - 120, time.time() - 120))
+    assert jobs.requeue_stale(max_age=60) == 1
+    assert jobs.get_batch(1, timeout=0)[0][0] == '00_job'
+
+
+def test_unreadable_job_becomes_error_result(tmp_path):
+    jobs = app.FilesystemJobQueue(str(tmp_path))
+    store = app.LocalFilesystemStore(str(tmp_path))
+    with open(os.path.join(jobs.pending, '00_broken.npy'), 'wb') as job_file:
+        job_file.write(b'not an array')
+
+    batch = jobs.get_batch(1, timeout=0)
+    assert batch == [('00_broken', None)]
+    app.InferenceWorker(jobs, store, batch_size=1).process(batch)
+
+    assert store.get_result('00_broken', timeout=0) == {'error': 'Could not read job'}
+    assert os.listdir(jobs.claimed) == []
+
+
+def test_inprocess_queue_batches_and_cancels():
+    jobs = app.InProcessJobQueue()
+    for job_id in ('a', 'b', 'c'):
+        jobs.put(job_id, job_array(0))
+    assert jobs.cancel('b')
+
+    assert [job_id for job_id, _ in jobs.get_batch(5, timeout=0.1)] == ['a', 'c']
+    assert not jobs.cancel('a')
+    assert jobs.get_batch(5, timeout=0.01) == []
+    assert jobs.requeue_stale(max_age=0) == 0
+
+
+def test_result_store_consumes_and_expires_results(tmp_path):
+    store = app.LocalFilesystemStore(str(tmp_path))
+    assert store.get_result('missing', timeout=0.02) is None
+
+    store.put_result('done', {'probabilities': [1.0]})
+    assert store.get_result('done', timeout=0) == {'probabilities': [1.0]}
+    assert store.get_result('done', timeout=0) is None  # results are consumed on read
+
+    store.put_result('fresh', {'x': 1})
+    store.put_result('orphan', {'x': 2})
+    orphan = os.path.join(store.results, 'orphan.json')
+    os.utime(orphan, (time.time() - 600, time.time() - 600))
+    store.expire_results(max_age=300)
+    assert os.listdir(store.results) == ['fresh.json']
+
+
+def test_inprocess_queue_requires_single_process_role(monkeypatch):
+    monkeypatch.setitem(app.app.config, 'JOB_QUEUE_BACKEND', 'inprocess')
+    monkeypatch.setitem(app.app.config, 'NODE_ROLE', 'frontend')
+    with pytest.raises(ValueError):
+        app.validate_distributed_config()
+
+    monkeypatch.setitem(app.app.config, 'NODE_ROLE', 'all')
+    app.validate_distributed_config()